@@ -1,5 +1,6 @@
 import asyncio
 import json
+from collections import OrderedDict
 from dataclasses import dataclass
 from functools import partial
 from pathlib import Path
@@ -71,6 +72,11 @@ class Offline(Client):
         self.tokenizer = AutoTokenizer.from_pretrained(model)
         self.batch_size = batch_size
         self.statistics = statistics
+        self._prefix_cache: OrderedDict[str, list[int]] = OrderedDict()
+        self._prefix_cache_size = 256
+        # Cleared if splicing prefix and suffix ids is ever caught producing
+        # different tokens than tokenizing the full prompt.
+        self._prefix_splice_safe = True
 
         if self.statistics:
             self.statistics_path = Path("statistics")
@@ -100,9 +106,7 @@ class Offline(Client):
         statistics = []
 
         for batch in batches:
-            prompt = self.tokenizer.apply_chat_template(
-                batch, add_generation_prompt=True, tokenize=True
-            )
+            prompt = self._tokenize_prompt(batch)
             prompts.append(prompt)
             if self.statistics:
                 non_cached_tokens = len(
@@ -148,6 +152,66 @@ class Offline(Client):
             )
         return new_response
 
+    def _tokenize_prompt(
+        self, batch: Union[str, dict[str, str], list[dict[str, str]]]
+    ) -> list[int]:
+        """
+        Tokenize a chat prompt, reusing cached token ids for the conversation
+        prefix (every message but the last). The prefix is shared across all
+        batches of a latent, so it only gets tokenized once. Splicing prefix
+        and suffix ids matches tokenizing the whole rendered prompt only when
+        the template delimits messages with special tokens, so the first fill
+        of each cached prefix is verified against the full tokenization and
+        the cache is disabled for templates where they disagree.
+        """
+        if (
+            not isinstance(batch, list)
+            or len(batch) < 2
+            or not self._prefix_splice_safe
+        ):
+            return self.tokenizer.apply_chat_template(
+                batch, add_generation_prompt=True, tokenize=True
+            )
+        full_text = self.tokenizer.apply_chat_template(
+            batch, add_generation_prompt=True, tokenize=False
+        )
+        prefix_text = self.tokenizer.apply_chat_template(
+            batch[:-1], add_generation_prompt=False, tokenize=False
+        )
+        if not full_text.startswith(prefix_text):
+            # Template doesn't render the prefix byte-identically; fall back
+            # to tokenizing the full prompt.
+            return self.tokenizer.apply_chat_template(
+                batch, add_generation_prompt=True, tokenize=True
+            )
+        suffix_ids = self.tokenizer(
+            full_text[len(prefix_text) :], add_special_tokens=False
+        )["input_ids"]
+        prefix_ids = self._prefix_cache.get(prefix_text)
+        if prefix_ids is None:
+            prefix_ids = self.tokenizer(prefix_text, add_special_tokens=False)[
+                "input_ids"
+            ]
+            # A BPE merge spanning the prefix/suffix boundary would silently
+            # change the ids fed to the model; check once per prefix before
+            # trusting the splice, and fall back for good on a mismatch.
+            full_ids = self.tokenizer.apply_chat_template(
+                batch, add_generation_prompt=True, tokenize=True
+            )
+            if prefix_ids + suffix_ids != full_ids:
+                logger.warning(
+                    "Chat template merges tokens across message boundaries; "
+                    "disabling the prefix token cache."
+                )
+                self._prefix_splice_safe = False
+                return full_ids
+            self._prefix_cache[prefix_text] = prefix_ids
+            if len(self._prefix_cache) > self._prefix_cache_size:
+                self._prefix_cache.popitem(last=False)
+        else:
+            self._prefix_cache.move_to_end(prefix_text)
+        return prefix_ids + suffix_ids
+
     async def generate(
         self, prompt: Union[str, list[dict[str, str]]], **kwargs
     ) -> Response:  # type: ignore
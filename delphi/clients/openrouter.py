@@ -1,4 +1,5 @@
 import json
+import random
 from asyncio import sleep
 
 import httpx
@@ -30,7 +31,10 @@ class OpenRouter(Client):
         self.max_tokens = max_tokens
         self.temperature = temperature
         timeout_config = httpx.Timeout(5.0)
-        self.client = httpx.AsyncClient(timeout=timeout_config)
+        # A larger connection pool avoids head-of-line blocking when many
+        # requests are in flight concurrently.
+        limits = httpx.Limits(max_connections=256, max_keepalive_connections=64)
+        self.client = httpx.AsyncClient(timeout=timeout_config, limits=limits)
         logger.warning("We currently don't support logprobs for OpenRouter")
 
     def postprocess(self, response):
@@ -74,7 +78,14 @@ class OpenRouter(Client):
             except Exception as e:
                 logger.warning(f"Attempt {attempt + 1}: {repr(e)}, retrying...")
 
-            await sleep(1)
+            # Jittered exponential backoff instead of a fixed delay.
+            await sleep(min(2**attempt, 30) + random.uniform(0, 0.5))
 
         logger.error("All retry attempts failed.")
         raise RuntimeError("Failed to generate text after multiple attempts.")
+
+    async def close(self):
+        """
+        Close the underlying HTTP client.
+        """
+        await self.client.aclose()
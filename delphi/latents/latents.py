@@ -1,7 +1,9 @@
 from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Literal, NamedTuple, Optional
 
 import blobfile as bf
+import numpy as np
 import orjson
 import torch
 from jaxtyping import Float, Int
@@ -157,6 +159,30 @@ class LatentRecord:
     """Frequency of the latent. Number of activations in a context per total
     number of contexts."""
 
+    train_idx: Optional[np.ndarray] = None
+    """Indices into `examples` of the training examples, set by the sampler.
+    Downstream code can fancy-index example metadata with these instead of
+    walking the `train` list."""
+
+    test_idx: Optional[np.ndarray] = None
+    """Indices into `examples` of the test examples, set by the sampler."""
+
+    @cached_property
+    def max_activations(self) -> np.ndarray:
+        """
+        Per-example maximum activation values, parallel to `examples`.
+        Cached on first access, so it should only be read once the record's
+        examples are final.
+
+        Returns:
+            np.ndarray: Float32 array of maximum activation values.
+        """
+        return np.fromiter(
+            (example.max_activation for example in self.examples),
+            dtype=np.float32,
+            count=len(self.examples),
+        )
+
     @property
     def max_activation(self) -> float:
         """
@@ -165,7 +191,7 @@ class LatentRecord:
         Returns:
             float: The maximum activation value.
         """
-        return self.examples[0].max_activation
+        return float(self.max_activations[0])
 
     def save(self, directory: str, save_examples: bool = False):
         """
@@ -184,6 +210,12 @@ class LatentRecord:
             serializable.pop("test")
 
         serializable.pop("latent")
+        # Drop the cached array if max_activations was ever accessed, and the
+        # index arrays; orjson cannot serialize NumPy arrays.
+        serializable.pop("max_activations", None)
+        serializable.pop("train_idx", None)
+        serializable.pop("test_idx", None)
+        serializable.pop("_boundary_cache", None)
         with bf.BlobFile(path, "wb") as f:
             f.write(orjson.dumps(serializable))
 
@@ -50,15 +50,23 @@ class TensorBuffer:
             Union[BufferOutput, None]: BufferOutput if enough examples,
                 None otherwise.
         """
-        latents, split_locations, split_activations = self.load_data_per_latent()
+        yield from self.iter_loaded(self.load_data_per_latent())
+
+    def iter_loaded(self, loaded_data):
+        """
+        Iterate over already-loaded buffer data, yielding LatentData objects.
+
+        Args:
+            loaded_data: The tuple returned by load_data_per_latent.
+        """
+        latents, offsets, locations, activations = loaded_data
 
         for i in range(len(latents)):
-            latent_locations = split_locations[i]
-            latent_activations = split_activations[i]
+            start, end = int(offsets[i]), int(offsets[i + 1])
             yield LatentData(
                 Latent(self.module_path, int(latents[i].item())),
                 self.module_path,
-                ActivationData(latent_locations, latent_activations),
+                ActivationData(locations[start:end], activations[start:end]),
             )
 
     @property
@@ -68,18 +76,24 @@ class TensorBuffer:
         return self._tokens
 
     def load_data_per_latent(self):
+        """
+        Load the buffer sorted by latent index.
+
+        Returns:
+            The unique latent indices, the offset of each latent's slice in
+            the sorted tensors, and the sorted locations and activations.
+            Latent i occupies rows offsets[i]:offsets[i + 1].
+        """
         locations, activations, _ = self.load()
         indices = torch.argsort(locations[:, 2], stable=True)
         activations = activations[indices]
         locations = locations[indices]
-        unique_latents, counts = torch.unique_consecutive(
+        latents, counts = torch.unique_consecutive(
             locations[:, 2], return_counts=True
         )
-        latents = unique_latents
-        split_locations = torch.split(locations, counts.tolist())
-        split_activations = torch.split(activations, counts.tolist())
+        offsets = torch.cat([counts.new_zeros(1), counts.cumsum(0)])
 
-        return latents, split_locations, split_activations
+        return latents, offsets, locations, activations
 
     def load(
         self,
@@ -320,11 +334,14 @@ class LatentDataset:
             temp_latents = buffer.latents
             # we remove the filter on latents
             buffer.latents = None
-            latents, locations, activations = buffer.load_data_per_latent()
+            latents, offsets, locations, activations = buffer.load_data_per_latent()
             # we restore the filter on latents
             buffer.latents = temp_latents
-            for latent, location, activation in zip(latents, locations, activations):
-                all_data[module][latent.item()] = ActivationData(location, activation)
+            for i, latent in enumerate(latents):
+                start, end = int(offsets[i]), int(offsets[i + 1])
+                all_data[module][latent.item()] = ActivationData(
+                    locations[start:end], activations[start:end]
+                )
         return all_data
 
     def __iter__(self):
@@ -346,11 +363,27 @@ class LatentDataset:
         finally:
             loop.close()
 
+    @asyncify
+    def _aload_buffer(self, buffer: TensorBuffer):
+        return buffer.load_data_per_latent()
+
     async def __aiter__(self):
-        """Asynchronously iterate over the dataset."""
+        """
+        Asynchronously iterate over the dataset. The next buffer's tensors
+        are loaded in a worker thread while the current buffer's latents are
+        being processed, overlapping file I/O with constructor/sampler work.
+        """
         tasks = set()
-        for buffer in self.buffers:
-            for data in buffer:
+        prefetch = None
+        for i, buffer in enumerate(self.buffers):
+            if prefetch is None:
+                prefetch = asyncio.create_task(self._aload_buffer(buffer))
+            loaded_data = await prefetch
+            if i + 1 < len(self.buffers):
+                prefetch = asyncio.create_task(
+                    self._aload_buffer(self.buffers[i + 1])
+                )
+            for data in buffer.iter_loaded(loaded_data):
                 if data is None:
                     continue
                 task = asyncio.create_task(self._aprocess_latent(data))
@@ -371,36 +404,6 @@ class LatentDataset:
                 if result is not None:
                     yield result
 
-    async def _aprocess_buffer(self, buffer: TensorBuffer):
-        """
-        Asynchronously process a buffer.
-
-        Args:
-            buffer (TensorBuffer): Buffer to process.
-
-        Yields:
-            Optional[LatentRecord]: Processed latent record or None.
-        """
-        tasks = set()
-        for data in buffer:
-            if data is None:
-                continue
-            task = asyncio.create_task(self._aprocess_latent(data))
-            tasks.add(task)
-            done, pending = await asyncio.wait(
-                tasks, return_when=asyncio.FIRST_COMPLETED
-            )
-            for task in done:
-                result = task.result()
-                if result is not None:
-                    yield result
-            tasks = pending
-        done, _ = await asyncio.wait(tasks)
-        for task in done:
-            result = task.result()
-            if result is not None:
-                yield result
-
     @asyncify
     def _aprocess_latent(self, latent_data: LatentData) -> LatentRecord | None:
         return self._process_latent(latent_data)
@@ -1,6 +1,8 @@
 import random
 from typing import Literal
 
+import numpy as np
+import torch
 from transformers import (
     PreTrainedTokenizer,
     PreTrainedTokenizerFast,
@@ -16,6 +18,17 @@ def normalize_activations(
     examples: list[ActivatingExample], max_activation: float, eps: float = 1e-6
 ) -> list[ActivatingExample]:
     max_activation = max(max_activation, eps)
+    if len(examples) == 0:
+        return examples
+    # Example windows share a context length, so the whole batch can be
+    # normalized with one stacked kernel instead of one per example.
+    ctx_len = len(examples[0].activations)
+    if all(len(example.activations) == ctx_len for example in examples):
+        stacked = torch.stack([example.activations for example in examples])
+        normalized = (stacked * 10 / max_activation).ceil().clamp(0, 10)
+        for example, normalized_activations in zip(examples, normalized):
+            example.normalized_activations = normalized_activations
+        return examples
     for example in examples:
         example.normalized_activations = (
             (example.activations * 10 / max_activation).ceil().clamp(0, 10)
@@ -23,33 +36,96 @@ def normalize_activations(
     return examples
 
 
+def _floyd(rng: random.Random, lo: int, hi: int, k: int) -> list[int]:
+    """
+    Floyd's algorithm: draw k distinct indices from [lo, hi) with exactly
+    k RNG calls and no rejection loop. Wins when k is much smaller than
+    the range; random.sample's selection-set bookkeeping wins when dense.
+    """
+    picked: set[int] = set()
+    for j in range(hi - k, hi):
+        t = rng.randrange(lo, j + 1)
+        picked.add(t if t not in picked else j)
+    return list(picked)
+
+
+def quantile_boundaries(
+    n_examples: int, n_quantiles: int, start: int = 0
+) -> np.ndarray:
+    """
+    Index boundaries of the equi-depth quantiles over the pre-sorted range
+    ``[start, n_examples)``. Callers splitting many records with the same
+    shape can compute these once and pass them to `split_quantiles`.
+    """
+    return start + np.arange(n_quantiles + 1) * ((n_examples - start) // n_quantiles)
+
+
 def split_quantiles(
-    examples: list[ActivatingExample], n_quantiles: int, n_samples: int, seed: int = 22
+    examples: list[ActivatingExample],
+    n_quantiles: int,
+    n_samples: int,
+    seed: int = 22,
+    rng: random.Random | None = None,
+    boundaries: np.ndarray | None = None,
+    start: int = 0,
+    boundary_cache: dict | None = None,
 ) -> list[ActivatingExample]:
     """
-    Randomly select (n_samples // n_quantiles) samples from each quantile.
+    Randomly select (n_samples // n_quantiles) samples from each quantile
+    of `examples[start:]`. Only the sampled examples are ever dereferenced;
+    neither the quantiles nor the offset range are materialized. A
+    caller-provided rng avoids reseeding per call when sampling many
+    records, precomputed `boundaries` skip the edge computation entirely,
+    and a `boundary_cache` dict memoizes the edges across repeated calls
+    with the same shape.
     """
-    random.seed(seed)
+    rng = rng or random.Random(seed)
 
-    quantile_size = len(examples) // n_quantiles
+    quantile_size = (len(examples) - start) // n_quantiles
     samples_per_quantile = n_samples // n_quantiles
+    if samples_per_quantile == 0:
+        return []
+    # Examples are pre-sorted, so the quantiles are uniform slices whose
+    # edges follow in closed form; no per-example bin assignment is needed.
+    if boundaries is None:
+        key = (n_quantiles, start, len(examples))
+        if boundary_cache is not None and key in boundary_cache:
+            boundaries = boundary_cache[key]
+        else:
+            boundaries = quantile_boundaries(len(examples), n_quantiles, start)
+            if boundary_cache is not None:
+                boundary_cache[key] = boundaries
+    # One vectorized guard replaces the per-quantile size check; with
+    # closed-form boundaries all quantiles share a size anyway.
+    short = np.diff(boundaries) < samples_per_quantile
+    if short.any():
+        logger.info(
+            f"Quantiles {np.flatnonzero(short).tolist()} have fewer than "
+            f"{samples_per_quantile} samples, using all"
+        )
+    # For large quantiles, NumPy's Floyd-style choice beats random.sample;
+    # for small ones the stdlib path wins, so branch on the bucket size.
+    # Seeding from rng keeps the draw deterministic per call.
+    gen = np.random.default_rng(rng.getrandbits(32)) if quantile_size > 1024 else None
     samples: list[ActivatingExample] = []
     for i in range(n_quantiles):
-        # Take an evenly spaced slice of the examples for the quantile.
-        quantile = examples[i * quantile_size : (i + 1) * quantile_size]
-
-        # Take a random sample of the examples.
-        if len(quantile) < samples_per_quantile:
-            sample = quantile
-            logger.info(
-                f"Quantile {i} has fewer than {samples_per_quantile} samples, using all"
-            )
+        # Each quantile is the contiguous index range [lo, hi); sample
+        # indices directly instead of materializing a bucket list.
+        lo, hi = int(boundaries[i]), int(boundaries[i + 1])
+
+        if short[i]:
+            picks = range(lo, hi)
+        elif gen is not None:
+            picks = gen.choice(hi - lo, size=samples_per_quantile, replace=False) + lo
+        elif samples_per_quantile * 10 < hi - lo:
+            picks = _floyd(rng, lo, hi, samples_per_quantile)
         else:
-            sample = random.sample(quantile, samples_per_quantile)
+            picks = rng.sample(range(lo, hi), samples_per_quantile)
         # set the quantile index
-        for example in sample:
+        picked = [examples[j] for j in picks]
+        for example in picked:
             example.quantile = i
-        samples.extend(sample)
+        samples.extend(picked)
 
     return samples
 
@@ -62,14 +138,16 @@ def train(
     n_quantiles: int = 10,
     seed: int = 22,
     ratio_top: float = 0.2,
+    rng: random.Random | None = None,
+    boundary_cache: dict | None = None,
 ):
+    rng = rng or random.Random(seed)
     match train_type:
         case "top":
             selected_examples = examples[:n_train]
             selected_examples = normalize_activations(selected_examples, max_activation)
             return selected_examples
         case "random":
-            random.seed(seed)
             n_sample = min(n_train, len(examples))
             if n_sample < n_train:
                 logger.warning(
@@ -77,19 +155,32 @@ def train(
                 )
                 selected_examples = examples
             else:
-                selected_examples = random.sample(examples, n_train)
+                # Sample indices rather than copying example references
+                # through random.sample's internal selection list.
+                selected_examples = [
+                    examples[i] for i in rng.sample(range(len(examples)), n_train)
+                ]
             selected_examples = normalize_activations(selected_examples, max_activation)
             return selected_examples
         case "quantiles":
-            selected_examples = split_quantiles(examples, n_quantiles, n_train)
+            selected_examples = split_quantiles(
+                examples, n_quantiles, n_train, rng=rng, boundary_cache=boundary_cache
+            )
             selected_examples = normalize_activations(selected_examples, max_activation)
             return selected_examples
         case "mix":
-            top_examples = examples[: int(n_train * ratio_top)]
+            n_top = int(n_train * ratio_top)
+            top_examples = examples[:n_top]
+            # The top slice and the quantile edges are all offsets into the
+            # same sorted list, so the tail is passed by offset rather than
+            # copied out with examples[n_top:].
             quantiles_examples = split_quantiles(
-                examples[int(n_train * ratio_top) :],
+                examples,
                 n_quantiles,
                 int(n_train * (1 - ratio_top)),
+                rng=rng,
+                start=n_top,
+                boundary_cache=boundary_cache,
             )
             selected_examples = top_examples + quantiles_examples
             selected_examples = normalize_activations(selected_examples, max_activation)
@@ -102,21 +193,57 @@ def test(
     n_test: int,
     n_quantiles: int,
     test_type: Literal["quantiles"],
+    rng: random.Random | None = None,
+    boundary_cache: dict | None = None,
 ):
     match test_type:
         case "quantiles":
-            selected_examples = split_quantiles(examples, n_quantiles, n_test)
+            selected_examples = split_quantiles(
+                examples, n_quantiles, n_test, rng=rng, boundary_cache=boundary_cache
+            )
             selected_examples = normalize_activations(selected_examples, max_activation)
             return selected_examples
 
 
+def _decode_str_tokens(
+    examples: list[ActivatingExample],
+    tokenizer: PreTrainedTokenizer | PreTrainedTokenizerFast,
+):
+    """
+    Decode the tokens of all examples with one batch_decode call instead of
+    one per example, then split the flat result back by example length.
+    """
+    if not examples:
+        return
+    flat = torch.cat([example.tokens for example in examples])
+    decoded = tokenizer.batch_decode(flat)
+    offset = 0
+    for example in examples:
+        n = len(example.tokens)
+        example.str_tokens = decoded[offset : offset + n]
+        offset += n
+
+
 def sampler(
     record: LatentRecord,
     cfg: SamplerConfig,
     tokenizer: PreTrainedTokenizer | PreTrainedTokenizerFast,
+    rng: random.Random | None = None,
 ):
     examples = record.examples
+    # Top slices and positional quantiles both rely on examples being
+    # sorted by descending max activation; check the invariant once here
+    # (elided under -O along with the rest of the assert).
+    assert len(examples) < 2 or bool(
+        np.all(np.diff(record.max_activations) <= 0)
+    ), "record.examples must be sorted in descending order of max activation"
     max_activation = record.max_activation
+    # Quantile edges are memoized on the record so repeated sampler calls
+    # (train plus test here, or a resample) reuse them; mirrors the
+    # per-example text cache in the classifier samples.
+    boundary_cache = getattr(record, "_boundary_cache", None)
+    if boundary_cache is None:
+        boundary_cache = record._boundary_cache = {}
     _train = train(
         examples,
         max_activation,
@@ -124,12 +251,22 @@ def sampler(
         cfg.train_type,
         n_quantiles=cfg.n_quantiles,
         ratio_top=cfg.ratio_top,
+        rng=rng,
+        boundary_cache=boundary_cache,
     )
+    # Sampled examples are references into record.examples, so the chosen
+    # indices can be recovered with one position map and kept as compact
+    # metadata alongside the lists.
+    positions = {id(example): i for i, example in enumerate(examples)}
     # Moved tokenization to sampler to avoid tokenizing
     # examples that are not going to be used
-    for example in _train:
-        example.str_tokens = tokenizer.batch_decode(example.tokens)
+    _decode_str_tokens(_train, tokenizer)
     record.train = _train
+    record.train_idx = np.fromiter(
+        (positions[id(example)] for example in _train),
+        dtype=np.int64,
+        count=len(_train),
+    )
     if cfg.n_examples_test > 0:
         _test = test(
             examples,
@@ -137,8 +274,14 @@ def sampler(
             cfg.n_examples_test,
             cfg.n_quantiles,
             cfg.test_type,
+            rng=rng,
+            boundary_cache=boundary_cache,
         )
-        for example in _test:
-            example.str_tokens = tokenizer.batch_decode(example.tokens)
+        _decode_str_tokens(_test, tokenizer)
         record.test = _test
+        record.test_idx = np.fromiter(
+            (positions[id(example)] for example in _test),
+            dtype=np.int64,
+            count=len(_test),
+        )
     return record
@@ -1,11 +1,14 @@
 import asyncio
-import json
+import hashlib
 import random
-import re
 from abc import abstractmethod
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from itertools import chain
 from typing import Any, Literal
 
 import numpy as np
+import orjson
 
 from delphi import logger
 
@@ -16,6 +19,12 @@ from .sample import ClassifierOutput, Sample
 
 
 class Classifier(Scorer):
+    _prompt_cache_size = 10_000
+    """Maximum number of rendered prompts kept in the exact-match cache."""
+
+    _result_cache_size = 100_000
+    """Maximum number of scored (explanation, text) pairs kept in the cache."""
+
     def __init__(
         self,
         client: Client,
@@ -23,6 +32,7 @@ class Classifier(Scorer):
         n_examples_shown: int,
         log_prob: bool,
         seed: int = 42,
+        max_concurrency: int = 32,
         **generation_kwargs,
     ):
         """
@@ -36,14 +46,27 @@ class Classifier(Scorer):
                         a larger number can both leak information and make
                         it harder for models to generate anwers in the correct format
             log_prob: Whether to use log probabilities to allow for AUC calculation
+            max_concurrency: The maximum number of batches scored concurrently.
+                        The client should be able to handle at least this many
+                        in-flight requests (e.g. vLLM's --max-num-seqs)
             generation_kwargs: Additional generation kwargs
         """
         self.client = client
         self.verbose = verbose
         self.n_examples_shown = n_examples_shown
-        self.generation_kwargs = generation_kwargs
+        # Resolved once here; _generate runs concurrently and must not
+        # mutate shared state per batch.
+        self.generation_kwargs = dict(generation_kwargs)
+        if log_prob:
+            self.generation_kwargs["logprobs"] = True
+            self.generation_kwargs["top_logprobs"] = 5
         self.log_prob = log_prob
+        self.max_concurrency = max_concurrency
         self.rng = random.Random(seed)
+        self._prompt_cache: OrderedDict[bytes, list[dict]] = OrderedDict()
+        self._result_cache: OrderedDict[
+            tuple[str, str], tuple[bool, float | None]
+        ] = OrderedDict()
 
     async def __call__(
         self,
@@ -52,10 +75,16 @@ class Classifier(Scorer):
         samples = self._prepare(record)
         self.rng.shuffle(samples)
 
-        batched_samples = self._batch(samples)
-        results = await self._query(
-            record.explanation,
-            batched_samples,
+        # Previously scored (explanation, text) pairs skip the LLM round-trip;
+        # only the remaining samples are batched and sent.
+        results, uncached_samples = self._split_cached(record.explanation, samples)
+
+        batched_samples = self._batch(uncached_samples)
+        results.extend(
+            await self._query(
+                record.explanation,
+                batched_samples,
+            )
         )
 
         return ScorerResult(record=record, score=results)
@@ -64,15 +93,40 @@ class Classifier(Scorer):
     def _prepare(self, record: LatentRecord) -> list[Sample]:
         pass
 
+    def _split_cached(
+        self, explanation: str, samples: list[Sample]
+    ) -> tuple[list[ClassifierOutput], list[Sample]]:
+        """
+        Fill outputs for samples already scored against this explanation from
+        the result cache, and return the samples that still need scoring.
+        """
+        results: list[ClassifierOutput] = []
+        uncached: list[Sample] = []
+        for sample in samples:
+            key = (explanation, sample.text)
+            cached = self._result_cache.get(key)
+            if cached is None:
+                uncached.append(sample)
+                continue
+            self._result_cache.move_to_end(key)
+            prediction, probability = cached
+            result = sample.data
+            result.prediction = prediction
+            result.correct = prediction == result.activating
+            result.probability = probability
+            results.append(result)
+        return results, uncached
+
     async def _query(
         self,
         explanation: str,
-        batches: list[list[Sample]],
+        batches: Iterable[list[Sample]],
     ) -> list[ClassifierOutput]:
         """
         Send and gather batches of samples to the model.
         """
-        sem = asyncio.Semaphore(1)
+        # Created here so the semaphore is bound to the running event loop.
+        sem = asyncio.Semaphore(self.max_concurrency)
 
         async def _process(explanation, batch):
             async with sem:
@@ -82,7 +136,7 @@ class Classifier(Scorer):
         tasks = [asyncio.create_task(_process(explanation, batch)) for batch in batches]
         results = await asyncio.gather(*tasks)
 
-        return sum(results, [])
+        return list(chain.from_iterable(results))
 
     async def _generate(
         self, explanation: str, batch: list[Sample]
@@ -92,9 +146,6 @@ class Classifier(Scorer):
         """
 
         prompt = self._build_prompt(explanation, batch)
-        if self.log_prob:
-            self.generation_kwargs["logprobs"] = True
-            self.generation_kwargs["top_logprobs"] = 5
         try:
             response = await self.client.generate(prompt, **self.generation_kwargs)
         except Exception as e:
@@ -125,6 +176,15 @@ class Classifier(Scorer):
             result.probability = probability
             results.append(result)
 
+            # Failed generations are not cached so they can be retried.
+            if result.prediction is not None:
+                self._result_cache[(explanation, sample.text)] = (
+                    result.prediction,
+                    probability,
+                )
+                if len(self._result_cache) > self._result_cache_size:
+                    self._result_cache.popitem(last=False)
+
             if self.verbose:
                 logger.info(
                     f"Example {sample.text}, "
@@ -138,12 +198,22 @@ class Classifier(Scorer):
     ) -> tuple[list[bool], list[float] | list[None]]:
         """Extract binary predictions and probabilities from a string and
         optionally its token logprobs."""
-        # Matches the first instance of text enclosed in square brackets
-        pattern = r"\[.*?\]"
-        match = re.search(pattern, string)
-        if match is None:
+        # Slice from each '[' to the next ']' and keep the first span that
+        # parses as JSON; unparseable spans (e.g. bracketed reasoning) are
+        # skipped, and a multiline answer still parses.
+        predictions: list[bool | Literal[0, 1]] | None = None
+        lb = string.find("[")
+        while lb != -1:
+            rb = string.find("]", lb)
+            if rb == -1:
+                break
+            try:
+                predictions = orjson.loads(string[lb : rb + 1])
+                break
+            except orjson.JSONDecodeError:
+                lb = string.find("[", lb + 1)
+        if predictions is None:
             raise ValueError("No match found in string")
-        predictions: list[bool | Literal[0, 1]] = json.loads(match.group(0))
         assert len(predictions) == self.n_examples_shown
         probabilities = (
             self._parse_logprobs(logprobs)
@@ -168,27 +238,46 @@ class Classifier(Scorer):
             list: Normalized probabilities between 0 and 1 where each value represents
             P(token='1').
         """
-        binary_probabilities: list[float] = []
-
-        for i in range(len(logprobs)):
-            if "1" in logprobs[i].token or "0" in logprobs[i].token:
-                top_logprobs = logprobs[i].top_logprobs
-                prob_0 = 0.0
-                prob_1 = 0.0
-                for i in range(len(top_logprobs)):
-                    token = top_logprobs[i].token
-                    logprob = top_logprobs[i].logprob
-                    if "0" in token:
-                        prob_0 += np.exp(logprob).item()
-                    elif "1" in token:
-                        prob_1 += np.exp(logprob).item()
-                if prob_0 + prob_1 > 0:
-                    binary_probabilities.append(prob_1 / (prob_0 + prob_1))
-                else:
-                    binary_probabilities.append(0.0)
-
-        assert len(binary_probabilities) == self.n_examples_shown
-        return binary_probabilities
+        # Flatten the top candidates of all binary response tokens into
+        # parallel arrays so the exp and the per-token sums run vectorized
+        # instead of one scalar np.exp per candidate.
+        tokens: list[str] = []
+        logps: list[float] = []
+        group_starts: list[int] = []
+        for response_logprob in logprobs:
+            if "1" in response_logprob.token or "0" in response_logprob.token:
+                group_starts.append(len(tokens))
+                for top_logprob in response_logprob.top_logprobs:
+                    tokens.append(top_logprob.token)
+                    logps.append(top_logprob.logprob)
+
+        assert len(group_starts) == self.n_examples_shown
+        if len(tokens) == 0:
+            return [0.0] * len(group_starts)
+
+        probs = np.exp(np.asarray(logps, dtype=np.float32))
+        token_arr = np.asarray(tokens, dtype=np.str_)
+        # View the fixed-width UTF-32 buffer as a (n_tokens, max_len)
+        # codepoint matrix (padding cells are 0), so digit membership is a
+        # plain vectorized comparison instead of np.char's per-string find.
+        codes = token_arr.view(np.uint32).reshape(len(token_arr), -1)
+        has_0 = (codes == ord("0")).any(axis=1)
+        # A candidate containing both digits counts towards '0' only,
+        # matching the original if/elif ordering.
+        has_1 = (codes == ord("1")).any(axis=1) & ~has_0
+
+        starts = np.asarray(group_starts)
+        lengths = np.diff(np.append(starts, len(tokens)))
+        # Trailing zero keeps reduceat in bounds when a group is empty.
+        prob_0 = np.add.reduceat(np.append(np.where(has_0, probs, 0.0), 0.0), starts)
+        prob_1 = np.add.reduceat(np.append(np.where(has_1, probs, 0.0), 0.0), starts)
+        prob_0[lengths == 0] = 0.0
+        prob_1[lengths == 0] = 0.0
+
+        denom = prob_0 + prob_1
+        binary_probabilities = np.zeros_like(denom)
+        np.divide(prob_1, denom, out=binary_probabilities, where=denom > 0)
+        return binary_probabilities.tolist()
 
     def _build_prompt(
         self,
@@ -203,17 +292,31 @@ class Classifier(Scorer):
             f"Example {i}: {sample.text}" for i, sample in enumerate(batch)
         )
 
-        return self.prompt(explanation=explanation, examples=examples)
+        # Exact-match cache: repeated (explanation, examples) pairs skip the
+        # template render entirely.
+        key = hashlib.blake2b(
+            f"{explanation}\x00{examples}".encode(), digest_size=16
+        ).digest()
+        cached = self._prompt_cache.get(key)
+        if cached is not None:
+            self._prompt_cache.move_to_end(key)
+            return cached
+
+        prompt = self.prompt(explanation=explanation, examples=examples)
+        self._prompt_cache[key] = prompt
+        if len(self._prompt_cache) > self._prompt_cache_size:
+            self._prompt_cache.popitem(last=False)
+        return prompt
 
     @abstractmethod
     def prompt(self, examples: str, explanation: str) -> list[dict]:
         pass
 
-    def _batch(self, samples: list[Sample]) -> list[list[Sample]]:
-        return [
+    def _batch(self, samples: list[Sample]) -> Iterator[list[Sample]]:
+        return (
             samples[i : i + self.n_examples_shown]
             for i in range(0, len(samples), self.n_examples_shown)
-        ]
+        )
 
     def call_sync(self, record: LatentRecord) -> ScorerResult:
         return asyncio.run(self.__call__(record))
@@ -87,6 +87,26 @@ def _prepare_text(
     n_incorrect: int,
     threshold: float,
     highlighted: bool,
+) -> tuple[str, list[str]]:
+    """
+    Memoized wrapper around _build_text. The same example is prepared with
+    identical arguments by each classifier variant (detection, fuzzing, ...),
+    so the rendered text is cached on the example itself.
+    """
+    key = (n_incorrect, threshold, highlighted)
+    cache = getattr(example, "_text_cache", None)
+    if cache is None:
+        cache = example._text_cache = {}
+    if key not in cache:
+        cache[key] = _build_text(example, n_incorrect, threshold, highlighted)
+    return cache[key]
+
+
+def _build_text(
+    example: ActivatingExample | NonActivatingExample,
+    n_incorrect: int,
+    threshold: float,
+    highlighted: bool,
 ) -> tuple[str, list[str]]:
     str_toks = example.str_tokens
     assert str_toks is not None, "str_toks were not set"
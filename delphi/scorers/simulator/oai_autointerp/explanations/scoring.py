@@ -2,7 +2,10 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from collections.abc import Callable, Sequence
+import math
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import replace
+from itertools import chain
 from typing import Any
 
 import numpy as np
@@ -17,14 +20,24 @@ from ..explanations.simulator import NeuronSimulator
 
 
 def flatten_list(list_of_lists: Sequence[Sequence[Any]]) -> list[Any]:
-    return [item for sublist in list_of_lists for item in sublist]
+    return list(chain.from_iterable(list_of_lists))
 
 
 def correlation_score(
     real_activations: Sequence[float] | np.ndarray,
     predicted_activations: Sequence[float] | np.ndarray,
 ) -> float:
-    return np.corrcoef(real_activations, predicted_activations)[0, 1]
+    # Inlined Pearson r; np.corrcoef builds a full 2x2 covariance matrix
+    # and copies both inputs.
+    x = np.asarray(real_activations, dtype=np.float32)
+    y = np.asarray(predicted_activations, dtype=np.float32)
+    xm = x - x.mean()
+    ym = y - y.mean()
+    # NaN on zero variance and a clip to [-1, 1] against fp32 rounding,
+    # matching np.corrcoef (NaN passes through the clip).
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (xm @ ym) / (np.linalg.norm(xm) * np.linalg.norm(ym))
+    return float(np.clip(r, -1.0, 1.0))
 
 
 def score_from_simulation(
@@ -46,24 +59,21 @@ def rsquared_score_from_sequences(
     real_activations: Sequence[float] | np.ndarray,
     predicted_activations: Sequence[float] | np.ndarray,
 ) -> float:
-    return float(
-        1
-        - np.mean(
-            np.square(np.array(real_activations) - np.array(predicted_activations))
-        )
-        / np.mean(np.square(np.array(real_activations)))
-    )
+    x = np.asarray(real_activations, dtype=np.float32)
+    y = np.asarray(predicted_activations, dtype=np.float32)
+    diff = x - y
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(1 - (diff @ diff) / (x @ x))
 
 
 def absolute_dev_explained_score_from_sequences(
     real_activations: Sequence[float] | np.ndarray,
     predicted_activations: Sequence[float] | np.ndarray,
 ) -> float:
-    return float(
-        1
-        - np.mean(np.abs(np.array(real_activations) - np.array(predicted_activations)))
-        / np.mean(np.abs(np.array(real_activations)))
-    )
+    x = np.asarray(real_activations, dtype=np.float32)
+    y = np.asarray(predicted_activations, dtype=np.float32)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(1 - np.abs(x - y).mean() / np.abs(x).mean())
 
 
 async def _simulate_and_score_sequence(
@@ -90,7 +100,8 @@ async def _simulate_and_score_sequence(
 
 
 def fix_nan(val):
-    if np.isnan(val):
+    # math.isnan is much cheaper than np.isnan on a Python float.
+    if math.isnan(val):
         return "nan"
     else:
         return float(val)
@@ -99,15 +110,18 @@ def fix_nan(val):
 def default(scored_simulation: ScoredSequenceSimulation) -> ScoredSequenceSimulation:
     ev_correlation_score = scored_simulation.ev_correlation_score
 
-    ev_correlation_score = fix_nan(ev_correlation_score)
+    if isinstance(ev_correlation_score, float) and math.isnan(ev_correlation_score):
+        # Rare NaN path: rebuild with the serializable "nan" sentinel.
+        return replace(
+            scored_simulation,
+            ev_correlation_score="nan",
+            absolute_dev_explained_score=None,
+        )
 
-    return ScoredSequenceSimulation(
-        distance=scored_simulation.distance,
-        simulation=scored_simulation.simulation,
-        true_activations=scored_simulation.true_activations,
-        ev_correlation_score=ev_correlation_score,
-        rsquared_score=scored_simulation.rsquared_score,
-    )
+    # fix_nan is a no-op for finite scores, so just drop the unused
+    # absolute_dev_explained_score in place instead of rebuilding.
+    scored_simulation.absolute_dev_explained_score = None
+    return scored_simulation
 
 
 def aggregate_scored_sequence_simulations(
@@ -120,16 +134,32 @@ def aggregate_scored_sequence_simulations(
     activations from all sequences at once rather than simply averaging
     per-sequence correlations.
     """
-    all_true_activations: list[float] = []
-    all_expected_values: list[float] = []
+    # Preallocate and fill by slice assignment instead of growing Python
+    # lists element by element across all sequences.
+    n_true = sum(
+        len(simulation.true_activations or ())
+        for simulation in scored_sequence_simulations
+    )
+    n_expected = sum(
+        len(simulation.simulation.expected_activations)
+        for simulation in scored_sequence_simulations
+    )
+    all_true_activations = np.empty(n_true, dtype=np.float32)
+    all_expected_values = np.empty(n_expected, dtype=np.float32)
+    true_offset = 0
+    expected_offset = 0
     for scored_sequence_simulation in scored_sequence_simulations:
-        all_true_activations.extend(scored_sequence_simulation.true_activations or [])
-        all_expected_values.extend(
-            scored_sequence_simulation.simulation.expected_activations
-        )
+        true_activations = scored_sequence_simulation.true_activations or ()
+        expected_values = scored_sequence_simulation.simulation.expected_activations
+        true_end = true_offset + len(true_activations)
+        expected_end = expected_offset + len(expected_values)
+        all_true_activations[true_offset:true_end] = true_activations
+        all_expected_values[expected_offset:expected_end] = expected_values
+        true_offset = true_end
+        expected_offset = expected_end
     ev_correlation_score = (
         correlation_score(all_true_activations, all_expected_values)
-        if (len(all_true_activations) > 0 and len(all_expected_values) > 0)
+        if (n_true > 0 and n_expected > 0)
         else 0
     )
     rsquared_score = 0
@@ -148,49 +178,62 @@ def aggregate_scored_sequence_simulations(
     )
 
 
+async def _bounded(
+    sem: asyncio.Semaphore, coro: Awaitable[ScoredSequenceSimulation]
+) -> ScoredSequenceSimulation:
+    async with sem:
+        return await coro
+
+
 async def simulate_and_score(
     simulator: NeuronSimulator,
     activation_records: Sequence[ActivationRecord],
     non_activation_records: Sequence[ActivationRecord],
+    max_concurrency: int = 32,
 ) -> list[ScoredSimulation]:
     """
     Score an explanation of a neuron by how well it predicts activations
-    on the given text sequences.
+    on the given text sequences. At most max_concurrency sequences are
+    simulated concurrently.
     """
-    scored_sequence_simulations = await asyncio.gather(
-        *[
-            _simulate_and_score_sequence(
-                simulator,
-                activation_record,
-                activation_record.quantile,
+    sem = asyncio.Semaphore(max_concurrency)
+    tasks = [
+        asyncio.create_task(
+            _bounded(
+                sem,
+                _simulate_and_score_sequence(
+                    simulator,
+                    activation_record,
+                    activation_record.quantile,
+                ),
             )
-            for activation_record in activation_records
-        ]
-    )
-
-    if len(non_activation_records) > 0:
-        non_activating_scored_seq_simulations = await asyncio.gather(
-            *[
+        )
+        for activation_record in activation_records
+    ]
+    non_activating_tasks = [
+        asyncio.create_task(
+            _bounded(
+                sem,
                 _simulate_and_score_sequence(
                     simulator, non_activation_record, non_activation_record.quantile
-                )
-                for non_activation_record in non_activation_records
-            ]
+                ),
+            )
         )
-    else:
-        non_activating_scored_seq_simulations = []
+        for non_activation_record in non_activation_records
+    ]
 
     values: list[ScoredSimulation] = []
-    simulations_per_distance = {}
+    simulations_per_distance: dict[int, list[ScoredSequenceSimulation]] = {}
     without_errors: list[ScoredSequenceSimulation] = []
-    for sequence in scored_sequence_simulations:
-
+    # gather keeps submission order (the semaphore still bounds concurrency),
+    # so buckets and serialized output stay deterministic run to run.
+    for sequence in await asyncio.gather(*tasks):
         if len(sequence.simulation.expected_activations) > 0:
             if sequence.distance + 1 not in simulations_per_distance:
                 simulations_per_distance[sequence.distance + 1] = []
             simulations_per_distance[sequence.distance + 1].append(sequence)
             without_errors.append(sequence)
-    for quantile in simulations_per_distance.keys():
+    for quantile in sorted(simulations_per_distance):
         values.append(
             aggregate_scored_sequence_simulations(
                 simulations_per_distance[quantile], quantile
@@ -198,7 +241,7 @@ async def simulate_and_score(
         )
 
     if len(non_activation_records) > 0:
-        for sequence in non_activating_scored_seq_simulations:
+        for sequence in await asyncio.gather(*non_activating_tasks):
             if len(sequence.simulation.expected_activations) > 0:
                 without_errors.append(sequence)
         values.append(aggregate_scored_sequence_simulations(without_errors, 0))